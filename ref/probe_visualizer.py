@@ -3,12 +3,29 @@ import json
 import numpy as np
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QPushButton, QFileDialog, QLabel, QTextEdit, QTabWidget)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, Signal
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from temp_flow_visualizer import TempFlowVisualizer
 
+class AnalysisSignals(QObject):
+    """Signals emitted by AnalysisWorker."""
+    finished = Signal(int, str)
+
+class AnalysisWorker(QRunnable):
+    """Run the bed leveling analysis off the Qt main thread."""
+    def __init__(self, request_id, analyze, points, z_values):
+        super().__init__()
+        self.request_id = request_id
+        self.analyze = analyze
+        self.points = points
+        self.z_values = z_values
+        self.signals = AnalysisSignals()
+        
+    def run(self):
+        self.signals.finished.emit(self.request_id, self.analyze(self.points, self.z_values))
+
 class ProbeVisualizer(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -72,10 +89,25 @@ class ProbeVisualizer(QMainWindow):
         
         # Initialize data
         self.probe_data = None
+        self._analysis_request = 0  # Identifies the latest background analysis
         self.annotation = None
+        self._background = None  # Cached canvas pixels used to blit hover annotations
+        
+        # Plot artists, created on the first load and reused afterwards
+        self.bed_ax = None
+        self.scatter = None
+        self.colorbar = None
+        self.stats_text = None
+        
+        # Coalesce bursts of mouse motion into at most one blit per frame
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(16)
+        self._hover_timer.timeout.connect(self.blit_annotation)
         
-        # Connect mouse events
+        # Connect mouse and draw events
         self.bed_canvas.mpl_connect('motion_notify_event', self.on_hover)
+        self.bed_canvas.mpl_connect('draw_event', self.on_draw)
         
     def analyze_bed_leveling(self, points, z_values):
         """Analyze bed leveling data and provide insights."""
@@ -86,17 +118,18 @@ class ProbeVisualizer(QMainWindow):
         z_std = np.std(z_values)
         
         # Convert points to numpy array for easier analysis
-        points = np.array(points)
-        
+        points = np.asarray(points, dtype=float)
+
         # Find locations of min and max points
         min_idx = np.argmin(z_values)
         max_idx = np.argmax(z_values)
         min_point = points[min_idx]
         max_point = points[max_idx]
-        
-        # Analyze bed tilt
-        x_correlation = np.corrcoef(points[:, 0], z_values)[0, 1]
-        y_correlation = np.corrcoef(points[:, 1], z_values)[0, 1]
+
+        # Analyze bed tilt - center once and get both correlations from dot products
+        pc = points - points.mean(axis=0)
+        zc = z_values - z_mean
+        x_correlation, y_correlation = (pc.T @ zc) / np.sqrt((pc * pc).sum(axis=0) * (zc @ zc))
         
         # Generate analysis text
         analysis = []
@@ -149,33 +182,53 @@ class ProbeVisualizer(QMainWindow):
         
         return "\n".join(analysis)
     
+    def on_draw(self, event):
+        """Cache the rendered figure so hover annotations can be blitted over it."""
+        self._background = self.bed_canvas.copy_from_bbox(self.bed_figure.bbox)
+        if self.annotation and self.annotation.get_visible():
+            self.bed_figure.draw_artist(self.annotation)
+    
     def on_hover(self, event):
         if not hasattr(self, 'scatter') or not self.scatter or not event.inaxes:
             return
+        if self._background is None:
+            return
             
         cont, ind = self.scatter.contains(event)
         if cont:
-            pos = self.scatter.get_offsets()[ind["ind"][0]]
+            pos = self.scatter_offsets[ind["ind"][0]]
             z_val = self.z_values[ind["ind"][0]]
             
-            # Remove previous annotation if it exists
-            if self.annotation:
-                self.annotation.remove()
-            
-            # Create new annotation
-            self.annotation = event.inaxes.annotate(
-                f'X: {pos[0]:.1f}\nY: {pos[1]:.1f}\nZ: {z_val:.3f}',
-                xy=(pos[0], pos[1]), xycoords='data',
-                xytext=(10, 10), textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
-                arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0')
-            )
+            # Create the annotation once; it is animated so full redraws skip it
+            if self.annotation is None:
+                self.annotation = event.inaxes.annotate(
+                    '', xy=(0, 0), xycoords='data',
+                    xytext=(10, 10), textcoords='offset points',
+                    bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
+                    arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'),
+                    animated=True
+                )
             
-            self.bed_canvas.draw_idle()
-        elif self.annotation:
-            self.annotation.remove()
-            self.annotation = None
-            self.bed_canvas.draw_idle()
+            # Move the existing annotation to the hovered point
+            self.annotation.xy = (pos[0], pos[1])
+            self.annotation.set_text(f'X: {pos[0]:.1f}\nY: {pos[1]:.1f}\nZ: {z_val:.3f}')
+            self.annotation.set_visible(True)
+        elif self.annotation and self.annotation.get_visible():
+            self.annotation.set_visible(False)
+        else:
+            return
+        
+        if not self._hover_timer.isActive():
+            self._hover_timer.start()
+    
+    def blit_annotation(self):
+        """Restore the cached background and redraw only the hover annotation."""
+        if self._background is None:
+            return
+        self.bed_canvas.restore_region(self._background)
+        if self.annotation and self.annotation.get_visible():
+            self.bed_figure.draw_artist(self.annotation)
+        self.bed_canvas.blit(self.bed_figure.bbox)
     
     def load_probe_report(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -213,68 +266,87 @@ class ProbeVisualizer(QMainWindow):
         if not self.probe_data:
             return
             
-        # Clear previous plot
-        self.bed_figure.clear()
-        
-        # Create subplot
-        ax = self.bed_figure.add_subplot(111)
-        
-        # Extract probe points
-        points = []
-        z_values = []
-        
         # Get the first probe report (assuming it's the most recent)
         report = self.probe_data["0"]
         probe_points = report["_ProbeReport__probe_points"]
-        
+
+        # Collect (x, y, z) rows and convert them in one array build, then
+        # take the positions and heights as column views
+        rows = []
         for point in probe_points:
             location = point["_ProbePoint__location"]
-            x = location["_Vector2__x"]
-            y = location["_Vector2__y"]
-            z = point["_ProbePoint__z_offset_from_bed_zero"]
-            
-            points.append([x, y])
-            z_values.append(z)
-        
-        points = np.array(points)
-        self.z_values = np.array(z_values)  # Store z_values as instance variable
+            rows.append((location["_Vector2__x"], location["_Vector2__y"],
+                         point["_ProbePoint__z_offset_from_bed_zero"]))
+        probe = np.array(rows, dtype=float)
+        points = probe[:, :2]
+        z_values = probe[:, 2]
+
+        self.z_values = z_values  # Store z_values as instance variable
         
         # Calculate statistics
         z_min = np.min(self.z_values)
         z_max = np.max(self.z_values)
-        z_variance = np.max(self.z_values) - np.min(self.z_values)
-        
-        # Create scatter plot
-        self.scatter = ax.scatter(points[:, 0], points[:, 1], c=self.z_values, 
-                                cmap='viridis', s=100)
-        
-        # Add colorbar
-        self.bed_figure.colorbar(self.scatter, ax=ax, label='Z Offset (mm)')
-        
-        # Set labels and title
-        ax.set_xlabel('X Position (mm)')
-        ax.set_ylabel('Y Position (mm)')
-        ax.set_title('Bed Leveling Probe Points')
+        z_variance = z_max - z_min
         
-        # Add statistics text
         stats_text = f'Min Z: {z_min:.3f} mm\nMax Z: {z_max:.3f} mm\nVariance: {z_variance:.3f} mm'
-        ax.text(0.02, 0.98, stats_text,
-                transform=ax.transAxes,
-                verticalalignment='top',
-                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
         
-        # Set equal aspect ratio
-        ax.set_aspect('equal')
+        if self.bed_ax is None:
+            # Build the axes, scatter plot, colorbar and labels on the first load
+            ax = self.bed_ax = self.bed_figure.add_subplot(111)
+            self.scatter = ax.scatter(points[:, 0], points[:, 1], c=self.z_values, 
+                                    cmap='viridis', s=100, rasterized=True)
+            self.colorbar = self.bed_figure.colorbar(self.scatter, ax=ax, label='Z Offset (mm)')
+            
+            # Set labels and title
+            ax.set_xlabel('X Position (mm)')
+            ax.set_ylabel('Y Position (mm)')
+            ax.set_title('Bed Leveling Probe Points')
+            
+            # Add statistics text
+            self.stats_text = ax.text(0.02, 0.98, stats_text,
+                                      transform=ax.transAxes,
+                                      verticalalignment='top',
+                                      bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+            
+            # Set equal aspect ratio
+            ax.set_aspect('equal')
+            
+            # Add grid
+            ax.grid(True)
+        else:
+            # Reuse the existing artists and only swap in the new data
+            ax = self.bed_ax
+            self.scatter.set_offsets(points)
+            self.scatter.set_array(self.z_values)
+            self.scatter.set_clim(z_min, z_max)
+            self.colorbar.update_normal(self.scatter)
+            self.stats_text.set_text(stats_text)
+            
+            # Rescale the axes to the new probe locations
+            ax.ignore_existing_data_limits = True
+            ax.update_datalim(points)
+            ax.autoscale_view()
+            
+            # Hide any hover annotation left over from the previous report
+            if self.annotation:
+                self.annotation.set_visible(False)
         
-        # Add grid
-        ax.grid(True)
+        # Cache the point offsets once; on_hover reads them on every mouse move
+        self.scatter_offsets = np.asarray(self.scatter.get_offsets())
         
         # Update canvas
         self.bed_canvas.draw()
         
-        # Update analysis text
-        analysis = self.analyze_bed_leveling(points, self.z_values)
-        self.analysis_text.setText(analysis)
+        # Update analysis text in the background so loading stays responsive
+        self._analysis_request += 1
+        worker = AnalysisWorker(self._analysis_request, self.analyze_bed_leveling, points, self.z_values)
+        worker.signals.finished.connect(self.on_analysis_finished)
+        QThreadPool.globalInstance().start(worker)
+    
+    def on_analysis_finished(self, request_id, analysis):
+        # Ignore results from reports that have since been replaced
+        if request_id == self._analysis_request:
+            self.analysis_text.setText(analysis)
 
 def main():
     app = QApplication(sys.argv)
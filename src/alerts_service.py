@@ -1,44 +1,64 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 import asyncio
 from collections import deque
 import hashlib
+import heapq
 import re
 
+# Patterns used to strip variable parts out of alert messages
+_RE_TIME = re.compile(r'\b\d{2}:\d{2}:\d{2}\b')
+_RE_DATE = re.compile(r'\b[A-Z][a-z]{2} \d{2}\b')
+_RE_NUM = re.compile(r'(?<!\d)(\d+(\.\d+)?(?!\%))')
+_RE_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+_RE_HEX = re.compile(r'0x[0-9a-f]+')
+
+def _hash_alert_content(alert_type: str, content: str) -> str:
+    """Hash "<type>-<content>" without building the joined string first"""
+    digest = hashlib.blake2b(alert_type.encode(), digest_size=16)
+    digest.update(b'-')
+    digest.update(content.encode())
+    return digest.hexdigest()
+
 class AlertsService:
     def __init__(self):
         self.active_alerts = {}  # Store active alerts by ID
         self.alert_history = deque(maxlen=1000)  # Store alert history
         self.lock = asyncio.Lock()  # Thread safety for alert processing
         self.local_alerts = {}  # Store local UI alerts (like system connection status)
+        self.recent_resolutions = {}  # Map alert ID to the time it was last resolved
+        # Parsed timestamps kept beside the ISO strings so sweeps don't re-parse them
+        self.updated_times = {}  # Map active alert ID to its last update time
+        self.expiry_heap = []  # (update time, alert ID) pairs, oldest first
+        self.history_created_times = deque(maxlen=1000)  # Creation time of each history entry
+        # Immutable snapshots handed to pollers, rebuilt only after a mutation
+        self._active_snapshot = None
+        self._history_snapshot = None
+        
+    def _invalidate_snapshots(self):
+        """Drop cached snapshots after active alerts or history change"""
+        self._active_snapshot = None
+        self._history_snapshot = None
         
     def _normalize_message(self, message: str) -> str:
         """Normalize a message by removing variable parts like timestamps and IDs"""
-        # Special handling for build completion alerts
-        if "Build has completed and is waiting for cleanup" in message:
-            return "Build has completed and is waiting for cleanup"
-        
-        # Special handling for system update alerts
-        if "Next update check scheduled for" in message:
-            return "Next update check scheduled"
-        
-        # Special handling for Stardust connection issues
-        if "Stardust service connection issues" in message:
-            return "Stardust service connection issues"
-        
         # Remove timestamps
-        message = re.sub(r'\b\d{2}:\d{2}:\d{2}\b', 'TIME', message)
+        message = _RE_TIME.sub('TIME', message)
         # Remove specific dates
-        message = re.sub(r'\b[A-Z][a-z]{2} \d{2}\b', 'DATE', message)
+        message = _RE_DATE.sub('DATE', message)
         # Remove numbers but keep percentages
-        message = re.sub(r'(?<!\d)(\d+(\.\d+)?(?!\%))', 'NUM', message)
+        message = _RE_NUM.sub('NUM', message)
         # Remove UUIDs and hex values
-        message = re.sub(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', 'UUID', message)
-        message = re.sub(r'0x[0-9a-f]+', 'HEX', message)
+        message = _RE_UUID.sub('UUID', message)
+        message = _RE_HEX.sub('HEX', message)
         return message
         
     def _generate_alert_id(self, alert_data: Dict) -> str:
         """Generate a consistent ID for an alert based on its content"""
+        # Alerts with a stable code are already uniquely identified by it
+        if 'code' in alert_data:
+            return _hash_alert_content(alert_data.get('type', ''), str(alert_data['code']))
+        
         # Create a normalized version of the message
         message = alert_data.get('message', '')
         if 'details' in alert_data and 'raw_message' in alert_data['details']:
@@ -47,8 +67,7 @@ class AlertsService:
         normalized_message = self._normalize_message(message)
         
         # Create a unique identifier based on the alert's content
-        content_str = f"{alert_data.get('type', '')}-{normalized_message}"
-        return hashlib.md5(content_str.encode()).hexdigest()
+        return _hash_alert_content(alert_data.get('type', ''), normalized_message)
         
     async def process_alert(self, alert_data: Dict) -> Optional[Dict]:
         """Process a new alert and update active alerts"""
@@ -57,32 +76,35 @@ class AlertsService:
             alert_id = self._generate_alert_id(alert_data)
             alert_data['id'] = alert_id
             
+            now = datetime.now()
+            
             # Don't process alerts that have been resolved recently (within last minute)
-            recent_resolved = any(
-                alert['id'] == alert_id and alert.get('resolved_at') and
-                (datetime.now() - datetime.fromisoformat(alert['resolved_at'])).total_seconds() < 60
-                for alert in self.alert_history
-            )
-            if recent_resolved:
+            resolved_at = self.recent_resolutions.get(alert_id)
+            if resolved_at and (now - resolved_at).total_seconds() < 60:
                 return None
                 
             # Check if this is a new alert or an update to an existing one
-            if alert_id in self.active_alerts:
-                existing_alert = self.active_alerts[alert_id]
+            existing_alert = self.active_alerts.get(alert_id)
+            if existing_alert is not None:
                 # Only update if the message has changed or significant time has passed
-                time_diff = (datetime.now() - datetime.fromisoformat(existing_alert['updated_at'])).total_seconds()
+                time_diff = (now - self.updated_times[alert_id]).total_seconds()
                 if time_diff > 60:  # Update if more than 60 seconds have passed
-                    existing_alert['updated_at'] = datetime.now().isoformat()
+                    existing_alert['updated_at'] = now.isoformat()
+                    self.updated_times[alert_id] = now
+                    heapq.heappush(self.expiry_heap, (now, alert_id))
                     existing_alert['occurrence_count'] = existing_alert.get('occurrence_count', 1) + 1
                     if 'details' in alert_data:
                         existing_alert['details'] = alert_data['details']
+                    self._invalidate_snapshots()
                 return existing_alert
             else:
                 # Add new alert
-                alert_data['created_at'] = datetime.now().isoformat()
+                alert_data['created_at'] = now.isoformat()
                 alert_data['updated_at'] = alert_data['created_at']
                 alert_data['occurrence_count'] = 1
                 self.active_alerts[alert_id] = alert_data
+                self.updated_times[alert_id] = now
+                heapq.heappush(self.expiry_heap, (now, alert_id))
                 
                 # Add to history
                 self.alert_history.append({
@@ -94,6 +116,8 @@ class AlertsService:
                     'details': alert_data.get('details', {}),
                     'occurrence_count': 1
                 })
+                self.history_created_times.append(now)
+                self._invalidate_snapshots()
                 
                 return alert_data
             
@@ -104,7 +128,9 @@ class AlertsService:
                 return None
                 
             alert = self.active_alerts[alert_id]
-            alert['resolved_at'] = datetime.now().isoformat()
+            resolved_at = datetime.now()
+            alert['resolved_at'] = resolved_at.isoformat()
+            self.recent_resolutions[alert_id] = resolved_at
             
             # Add resolution to history
             self.alert_history.append({
@@ -118,42 +144,73 @@ class AlertsService:
                 'occurrence_count': alert.get('occurrence_count', 1),
                 'resolved': True
             })
+            self.history_created_times.append(datetime.fromisoformat(alert['created_at']))
             
             # Remove from active alerts
             del self.active_alerts[alert_id]
+            del self.updated_times[alert_id]
+            self._invalidate_snapshots()
             
             return alert
             
-    def get_active_alerts(self) -> List[Dict]:
-        """Get all active alerts"""
-        # Combine server alerts and local UI alerts
-        alerts = list(self.active_alerts.values())
-        alerts.extend(self.local_alerts.values())
-        return alerts
+    def get_active_alerts(self) -> Tuple[Dict, ...]:
+        """Get all active alerts as a shared snapshot"""
+        if self._active_snapshot is None:
+            # Combine server alerts and local UI alerts
+            self._active_snapshot = (*self.active_alerts.values(), *self.local_alerts.values())
+        return self._active_snapshot
         
-    def get_alert_history(self, limit: int = 100) -> List[Dict]:
-        """Get alert history"""
-        return list(self.alert_history)[-limit:]
+    def get_alert_history(self, limit: int = 100) -> Tuple[Dict, ...]:
+        """Get alert history as a shared snapshot"""
+        if self._history_snapshot is None:
+            self._history_snapshot = tuple(self.alert_history)
+        # A slice covering the whole tuple returns the snapshot itself
+        return self._history_snapshot[-limit:]
         
     async def clear_old_alerts(self, max_age_hours: int = 24):
         """Clear alerts older than max_age_hours"""
         current_time = datetime.now()
         async with self.lock:
-            # Clear old active alerts based on last update time
-            self.active_alerts = {
-                k: v for k, v in self.active_alerts.items()
-                if (current_time - datetime.fromisoformat(v['updated_at'])).total_seconds() < max_age_hours * 3600
-            }
+            # Clear old active alerts based on last update time. Heap entries
+            # superseded by a later update or a resolution are skipped.
+            cutoff = current_time - timedelta(hours=max_age_hours)
+            # Snapshots are only rebuilt when something was actually removed,
+            # since this runs on every system log poll
+            removed = False
+            while self.expiry_heap and self.expiry_heap[0][0] <= cutoff:
+                updated_time, alert_id = heapq.heappop(self.expiry_heap)
+                if self.updated_times.get(alert_id) == updated_time:
+                    del self.updated_times[alert_id]
+                    del self.active_alerts[alert_id]
+                    removed = True
             
             # Clear old history
-            self.alert_history = deque(
-                (alert for alert in self.alert_history
-                 if (current_time - datetime.fromisoformat(alert['created_at'])).total_seconds() < max_age_hours * 3600),
-                maxlen=1000
-            )
+            kept = [
+                (alert, created) for alert, created in zip(self.alert_history, self.history_created_times)
+                if created > cutoff
+            ]
+            if len(kept) != len(self.alert_history):
+                self.alert_history = deque((alert for alert, _ in kept), maxlen=1000)
+                self.history_created_times = deque((created for _, created in kept), maxlen=1000)
+                removed = True
+            
+            # Forget resolutions that no longer suppress repeat alerts
+            resolution_cutoff = current_time - timedelta(seconds=60)
+            self.recent_resolutions = {
+                k: v for k, v in self.recent_resolutions.items()
+                if v > resolution_cutoff
+            }
             
-            # Clear old local alerts
-            self.local_alerts = {
+            # Clear old local alerts. ISO timestamps from isoformat() order
+            # lexicographically, so compare strings instead of parsing each one.
+            cutoff_iso = cutoff.isoformat()
+            local_alerts = {
                 k: v for k, v in self.local_alerts.items()
-                if (current_time - datetime.fromisoformat(v['created_at'])).total_seconds() < max_age_hours * 3600
-            } 
\ No newline at end of file
+                if v['created_at'] > cutoff_iso
+            }
+            if len(local_alerts) != len(self.local_alerts):
+                self.local_alerts = local_alerts
+                removed = True
+            
+            if removed:
+                self._invalidate_snapshots() 
\ No newline at end of file
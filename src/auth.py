@@ -23,10 +23,13 @@ def verify_password(password, hashed_password):
     """Verify a password against its hash"""
     return hmac.compare_digest(hash_password(password), hashed_password)
 
+# Hash of the default password, computed once at startup
+DEFAULT_PASSWORD_HASH = hash_password(DEFAULT_PASSWORD)
+
 def get_hashed_password(username):
     """Get the hashed password for a username"""
     if username == DEFAULT_USERNAME:
-        return hash_password(DEFAULT_PASSWORD)
+        return DEFAULT_PASSWORD_HASH
     return None
 
 async def authenticate(username, password):
@@ -1,11 +1,21 @@
 import aiohttp
+import orjson
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
 class EventLogService:
     def __init__(self, base_url: str = "http://192.168.6.218"):
         self.base_url = base_url
         self.events_endpoint = f"{base_url}/api/v1/history/events"
+        self.session: Optional[aiohttp.ClientSession] = None  # The app's shared client session
+
+    def use_session(self, session: aiohttp.ClientSession) -> None:
+        """
+        Make requests on the app's shared client session; the app owns
+        it and closes it on cleanup
+        """
+        self.session = session
 
     async def get_events(self, count: Optional[int] = None) -> List[Dict[Any, Any]]:
         """
@@ -19,20 +29,22 @@ class EventLogService:
             if count is not None:
                 url = f"{url}?count={count}"
                 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Error fetching events: {response.status}")
-                        return []
+            async with self.session.get(url) as response:
+                if response.status == 200:
+                    return orjson.loads(await response.read())
+                else:
+                    print(f"Error fetching events: {response.status}")
+                    return []
         except Exception as e:
             print(f"Error fetching events: {e}")
             return []
 
-    def format_event_time(self, time_str: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def format_event_time(time_str: str) -> str:
         """
         Format the event time string to a more readable format
+        Results are memoized since many events share the same timestamp
         """
         try:
             dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
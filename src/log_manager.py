@@ -1,85 +1,128 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 import re
 from typing import Dict, List, Set, Optional
-import asyncio
 from collections import deque
+from itertools import islice
 from operator import itemgetter
 import hashlib
 from alerts_service import AlertsService
 
+# Syslog line: "<Mon DD HH:MM:SS> <host> <message>"
+_RE_HEADER = re.compile(r"(\w+ \d+ \d+:\d+:\d+) \S+ (.+)")
+_RE_UPDATE_CHECK = re.compile(r'Scheduling next check for updates in (\d+\.\d+) minute')
+_RE_FAIL_REASON = re.compile(r'fail_reason: ([^)]+)')
+_RE_TRAILING_IP = re.compile(r'\n\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+_RE_MJPG_CLIENT = re.compile(r'serving client: (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})')
+_RE_FAILED_FETCH = re.compile(r'Failed to fetch .+ at (http[^\s]+)')
+
+# Patterns used to replace variable parts of a message with placeholders
+_RE_TIME = re.compile(r'\d{2}:\d{2}:\d{2}')
+_RE_DECIMAL = re.compile(r'\d+\.\d+')
+_RE_INTEGER = re.compile(r'\d+')
+_RE_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+_RE_HEX = re.compile(r'0x[0-9a-f]+')
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp(timestamp: str) -> datetime:
+    """Parse a syslog timestamp (no year), memoized since many lines share one"""
+    return datetime.strptime(timestamp, '%b %d %H:%M:%S')
+
+# Most lines collect_newest_groups walks back through, however few groups it finds
+NEWEST_SCAN_LIMIT = 5000
+
+class LogEntry:
+    """A parsed syslog line; slotted since one is built per processed line"""
+    __slots__ = ('timestamp', 'message', 'raw', 'pattern', 'group_key', 'parsed_time')
+    
+    def __init__(self, timestamp: str, message: str, raw: str, pattern: str, group_key: tuple, parsed_time: datetime):
+        self.timestamp = timestamp
+        self.message = message
+        self.raw = raw
+        self.pattern = pattern
+        self.group_key = group_key
+        self.parsed_time = parsed_time
+
 class LogManager:
     def __init__(self):
         self.message_patterns = {}  # Track message patterns and their variations
         self.seen_messages = set()  # Track unique messages
         self.log_buffer = deque(maxlen=1000)  # Store last 1000 processed logs
-        self.lock = asyncio.Lock()  # Thread safety for log processing
         self.last_cleanup_state = None  # Track the last cleanup state
         self.alerts_service = AlertsService()  # Initialize alerts service
         
-    async def process_log_entry(self, log_entry: str) -> Optional[Dict]:
+    def process_log_entry(self, log_entry: str) -> Optional[LogEntry]:
         """Process a single log entry and return structured data"""
-        async with self.lock:
-            # Extract timestamp and message parts
-            match = re.match(r"(\w+ \d+ \d+:\d+:\d+) \S+ (.+)", log_entry)
-            if not match:
-                return None
-                
-            timestamp, message = match.groups()
-            
-            # Parse timestamp for sorting
-            try:
-                parsed_time = datetime.strptime(timestamp, '%b %d %H:%M:%S')
-                # Add current year since logs don't include it
-                parsed_time = parsed_time.replace(year=datetime.now().year)
-            except ValueError:
-                return None
+        # Extract timestamp and message parts
+        match = _RE_HEADER.match(log_entry)
+        if not match:
+            return None
+        return self._process_match(log_entry, match)
+    
+    def _process_match(self, log_entry: str, match: re.Match) -> Optional[LogEntry]:
+        """Build structured data for a log entry whose header already matched"""
+        timestamp, message = match.groups()
+        
+        # Parse timestamp for sorting
+        try:
+            parsed_time = _parse_timestamp(timestamp)
+            # Add current year since logs don't include it
+            parsed_time = parsed_time.replace(year=datetime.now().year)
+        except ValueError:
+            return None
 
-            # Create message pattern for grouping
-            pattern = self.get_message_pattern(message)
-            
-            # Create unique key for this message group
-            # Include minute in key to group messages within same minute
-            group_key = f"{pattern}:{parsed_time.strftime('%Y%m%d%H%M')}"
-            
-            # Special handling for cleanup messages
-            if "WAIT_FOR_CLEANUP" in message:
-                current_state = {
-                    'timestamp': timestamp,
-                    'parsed_time': parsed_time,
-                    'message': message
-                }
-                
-                # Only process if this is a new cleanup state or significant time has passed
-                if not self.last_cleanup_state or \
-                   self.last_cleanup_state['timestamp'] != timestamp:
-                    self.last_cleanup_state = current_state
-                else:
-                    return None
-            
-            return {
+        # Create message pattern for grouping
+        pattern = self.get_message_pattern(message)
+        
+        # Create unique key for this message group
+        # Include minute in key to group messages within same minute; a tuple
+        # key skips formatting the time into a string
+        group_key = (pattern, parsed_time.replace(second=0))
+        
+        # Special handling for cleanup messages
+        if "WAIT_FOR_CLEANUP" in message:
+            current_state = {
                 'timestamp': timestamp,
-                'message': message,
-                'raw': log_entry,
-                'pattern': pattern,
-                'group_key': group_key
+                'parsed_time': parsed_time,
+                'message': message
             }
+            
+            # Only process if this is a new cleanup state or significant time has passed
+            if not self.last_cleanup_state or \
+               self.last_cleanup_state['timestamp'] != timestamp:
+                self.last_cleanup_state = current_state
+            else:
+                return None
+        
+        return LogEntry(timestamp, message, log_entry, pattern, group_key, parsed_time)
 
-    async def process_logs(self, logs: List[str]) -> List[Dict]:
-        """Process a list of log entries and return structured data"""
-        processed_entries = []
-        processed_groups = {}
+    async def process_logs(self, logs: List[str], limit: Optional[int] = None) -> List[Dict]:
+        """Process a list of log entries and return structured data
+        
+        With a limit, only the newest `limit` message groups are processed.
+        """
+        if limit is not None:
+            processed_groups = self.collect_newest_groups(logs, limit)
+        else:
+            processed_groups = {}
+            setdefault_group = processed_groups.setdefault
 
-        for log_entry in logs:
-            entry = await self.process_log_entry(log_entry)
-            if entry:
-                # Use group_key to deduplicate similar messages within the same minute
-                if entry['group_key'] not in processed_groups:
-                    processed_groups[entry['group_key']] = entry
+            # Match every header up front in one C-level pass, then build
+            # entries only for the lines that look like syslog entries
+            for log_entry, match in zip(logs, map(_RE_HEADER.match, logs)):
+                if not match:
+                    continue
+                entry = self._process_match(log_entry, match)
+                if entry:
+                    # Use group_key to deduplicate similar messages within the same minute
+                    setdefault_group(entry.group_key, entry)
 
-        result = []
+        # (parsed time, formatted entry) pairs so sorting needs no re-parsing
+        keyed_results = []
         for entry in processed_groups.values():
-            # Get the base message without variable parts
-            base_message = self.get_base_message(entry['raw'])
+            # Get the base message without variable parts, reusing the
+            # message process_log_entry already split off the header
+            base_message = self.clean_message(entry.message)
             
             # Determine message type and create alert data
             msg_type = 'info'
@@ -96,14 +139,15 @@ class LogManager:
                 alert_data = {
                     'type': 'info',
                     'message': 'Build Complete',
+                    'code': 'build_complete',
                     'details': {
-                        'raw_message': f"Build has completed and is waiting for cleanup at {entry['timestamp']}",
-                        'timestamp': entry['timestamp']
+                        'raw_message': f"Build has completed and is waiting for cleanup at {entry.timestamp}",
+                        'timestamp': entry.timestamp
                     }
                 }
             elif 'SystemService' in base_message and 'Scheduling next check for updates' in base_message:
                 # System update check alert
-                update_match = re.search(r'Scheduling next check for updates in (\d+\.\d+) minute', base_message)
+                update_match = _RE_UPDATE_CHECK.search(base_message)
                 if update_match:
                     minutes = float(update_match.group(1))
                     next_check = datetime.now() + timedelta(minutes=minutes)
@@ -111,21 +155,23 @@ class LogManager:
                     alert_data = {
                         'type': 'info',
                         'message': 'System Updates',
+                        'code': 'update_check',
                         'details': {
                             'raw_message': f"Next update check scheduled for {time_string}",
-                            'timestamp': entry['timestamp']
+                            'timestamp': entry.timestamp
                         }
                     }
             elif 'StardustService' in base_message and 'Connection stopped working' in base_message:
                 # Stardust connection alert
-                fail_match = re.search(r'fail_reason: ([^)]+)', base_message)
+                fail_match = _RE_FAIL_REASON.search(base_message)
                 fail_reason = fail_match.group(1) if fail_match else 'unknown reason'
                 alert_data = {
                     'type': 'warning',
                     'message': 'Stardust Service',
+                    'code': 'stardust_connection',
                     'details': {
                         'raw_message': f"Stardust service connection issues. Error: {fail_reason}",
-                        'timestamp': entry['timestamp']
+                        'timestamp': entry.timestamp
                     }
                 }
             elif msg_type in ['warning', 'error']:
@@ -135,7 +181,7 @@ class LogManager:
                     'message': base_message.split(' - ', 1)[0] if ' - ' in base_message else base_message,
                     'details': {
                         'raw_message': base_message,
-                        'timestamp': entry['timestamp']
+                        'timestamp': entry.timestamp
                     }
                 }
             
@@ -145,32 +191,54 @@ class LogManager:
             
             # Format the entry
             formatted_entry = {
-                'timestamp': entry['timestamp'],
+                'timestamp': entry.timestamp,
                 'message': base_message,
                 'type': msg_type,
                 'occurrences': 1,
-                'raw': entry['raw']
+                'raw': entry.raw
             }
-            result.append(formatted_entry)
+            keyed_results.append((entry.parsed_time, formatted_entry))
         
         # Sort by parsed timestamp, newest first
-        result.sort(key=lambda x: datetime.strptime(x['timestamp'], '%b %d %H:%M:%S'), reverse=True)
+        keyed_results.sort(key=itemgetter(0), reverse=True)
+        result = [formatted_entry for _, formatted_entry in keyed_results]
         
         return result
     
+    def collect_newest_groups(self, logs: List[str], limit: int) -> Dict[tuple, LogEntry]:
+        """Group entries walking back from the newest line, stopping at `limit` groups"""
+        processed_groups = {}
+        for log_entry in islice(reversed(logs), NEWEST_SCAN_LIMIT):
+            match = _RE_HEADER.match(log_entry)
+            if not match:
+                continue
+            entry = self._process_match(log_entry, match)
+            if entry is None:
+                continue
+            # The membership test only matters once the limit is reached
+            if len(processed_groups) >= limit and entry.group_key not in processed_groups:
+                break
+            # Older lines overwrite newer ones so each group keeps its first line
+            processed_groups[entry.group_key] = entry
+        return processed_groups
+    
     def get_base_message(self, message: str) -> str:
         """Get the base message without variable parts"""
         # Extract timestamp and actual message
-        match = re.match(r"\w+ \d+ \d+:\d+:\d+ \S+ (.+)", message)
+        match = _RE_HEADER.match(message)
         if not match:
             return message
             
-        base_msg = match.group(1)
-        
+        return self.clean_message(match.group(2))
+    
+    def clean_message(self, base_msg: str) -> str:
+        """Clean up a message already split from its syslog header"""
         # Handle special cases
-        if 'MJPG-streamer' in base_msg and 'serving client' in base_msg:
+        # Only lines with a newline can carry a duplicated trailing IP, and
+        # almost none do, so test for it before the MJPG-streamer markers
+        if '\n' in base_msg and 'MJPG-streamer' in base_msg and 'serving client' in base_msg:
             # Remove duplicate IP addresses
-            base_msg = re.sub(r'\n\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', '', base_msg)
+            base_msg = _RE_TRAILING_IP.sub('', base_msg)
         
         return base_msg
     
@@ -182,8 +250,9 @@ class LogManager:
         # Get unique IP addresses for MJPG-streamer messages
         if 'MJPG-streamer' in raw_messages[0] and 'serving client' in raw_messages[0]:
             ips = set()
+            search = _RE_MJPG_CLIENT.search
             for msg in raw_messages:
-                ip_match = re.search(r'serving client: (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', msg)
+                ip_match = search(msg)
                 if ip_match:
                     ips.add(ip_match.group(1))
             if ips:
@@ -192,8 +261,9 @@ class LogManager:
         # Extract error details for warning messages
         elif 'Failed to fetch' in raw_messages[0]:
             urls = set()
+            search = _RE_FAILED_FETCH.search
             for msg in raw_messages:
-                url_match = re.search(r'Failed to fetch .+ at (http[^\s]+)', msg)
+                url_match = search(msg)
                 if url_match:
                     urls.add(url_match.group(1))
             if urls:
@@ -204,13 +274,13 @@ class LogManager:
     def get_message_pattern(self, message: str) -> str:
         """Extract a pattern from the message by replacing variable parts with placeholders"""
         # Replace timestamps
-        pattern = re.sub(r'\d{2}:\d{2}:\d{2}', 'TIME', message)
+        pattern = _RE_TIME.sub('TIME', message)
         # Replace numbers
-        pattern = re.sub(r'\d+\.\d+', 'NUM', pattern)
-        pattern = re.sub(r'\d+', 'NUM', pattern)
+        pattern = _RE_DECIMAL.sub('NUM', pattern)
+        pattern = _RE_INTEGER.sub('NUM', pattern)
         # Replace UUIDs and other hex strings
-        pattern = re.sub(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', 'UUID', pattern)
-        pattern = re.sub(r'0x[0-9a-f]+', 'HEX', pattern)
+        pattern = _RE_UUID.sub('UUID', pattern)
+        pattern = _RE_HEX.sub('HEX', pattern)
         return pattern
     
     def get_recent_logs(self, limit: int = 100) -> List[Dict]:
@@ -1,7 +1,8 @@
 import os
-import json
+import orjson
 import aiohttp
 from aiohttp import web
+from aiohttp.log import access_logger
 from aiohttp_cors import CorsConfig, ResourceOptions
 from dotenv import load_dotenv
 import aiohttp_cors
@@ -16,6 +17,12 @@ import jinja2
 from aiohttp_session import setup, SimpleCookieStorage, session_middleware
 from auth import login_handler, logout_handler, login_page, login_required, SECRET_KEY
 import asyncio
+import functools
+import gzip
+import hashlib
+import itertools
+from collections import OrderedDict
+import operator
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +33,19 @@ config = {
     'tolerance_threshold': 1.0  # Default tolerance threshold in mm
 }
 
+# Printer URLs derived from config['printer_ip'], empty while it is unset
+printer_urls = {}
+
+def rebuild_printer_urls():
+    """Rebuild printer_urls after the printer IP changes"""
+    printer_ip = config['printer_ip']
+    printer_urls.clear()
+    if printer_ip:
+        printer_urls['api'] = f'http://{printer_ip}/api/v1'
+        printer_urls['stream'] = f'http://{printer_ip}:8080/?action=stream'
+
+rebuild_printer_urls()
+
 # Initialize log manager and event log service as global instances
 log_manager = LogManager()
 event_log_service = EventLogService()
@@ -33,582 +53,663 @@ print_jobs_service = PrintJobsService()
 
 routes = web.RouteTableDef()
 
+# Most flow-data samples a single request may ask the printer for
+MAX_FLOW_SAMPLES = 5000
+
+# Seconds the printer status and current job responses are reused, so
+# several open dashboards share one upstream request
+PRINTER_STATS_TTL = 0.5
+PRINT_JOB_TTL = 0.5
+
+# Seconds a fetched system log is reused; both /api/print-cores and
+# /api/system-log read it and the dashboard polls each once a second
+SYSTEM_LOG_TTL = 1.0
+
+# Newest system log lines searched for PrintCore readings
+PRINTCORE_SCAN_LIMIT = 2000
+
+# Analyzed probe reports kept, so polling an unchanged report skips the analysis
+PROBE_REPORT_CACHE_SIZE = 8
+
+# PrintCore extrusion report in the system log
+# Numbers must be digits with an optional fraction, so a malformed value such
+# as "1.2.3" skips the line instead of failing in float(), and only the two
+# cores the printer has can match
+_RE_PRINTCORE = re.compile(r"PrintCore ([01]) extruded (\d+(?:\.\d+)?) mm in (\d+(?:\.\d+)?) s, remaining length = (\d+(?:\.\d+)?) mm, stat record usage duration: (\d+(?:\.\d+)?) s")
+
+def json_response(data, status=200):
+    """JSON response encoded with orjson"""
+    return web.Response(body=orjson.dumps(data), status=status, content_type='application/json')
+
+async def fetch_upstream(app, session, url, decode):
+    """GET url on session and return (status, body); with decode set
+    the body is the parsed JSON on a 200 and None otherwise"""
+    async with session.get(url) as response:
+        status = response.status
+        body = await response.read()
+    if decode:
+        body = orjson.loads(body) if status == 200 else None
+    app['upstream_cache'][url, decode] = (asyncio.get_running_loop().time(), status, body)
+    return status, body
+
+async def get_shared(app, session, url, ttl=1.0, decode=False):
+    """GET url, sharing one request among concurrent callers and reusing its result for ttl seconds"""
+    key = (url, decode)
+    cached = app['upstream_cache'].get(key)
+    if cached and asyncio.get_running_loop().time() - cached[0] < ttl:
+        return cached[1], cached[2]
+    task = app['upstream_inflight'].get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_upstream(app, session, url, decode))
+        app['upstream_inflight'][key] = task
+        task.add_done_callback(lambda _: app['upstream_inflight'].pop(key, None))
+    # Shielded so one caller going away does not cancel the others' request
+    return await asyncio.shield(task)
+
+# Encoded once since every proxy request fails with it while no printer is set
+_NO_PRINTER_IP_BODY = orjson.dumps({'error': 'Printer IP not configured'})
+
+def with_printer(error_prefix):
+    """Wrap a printer proxy handler: require the printer IP, pass its API URL and the shared session in, and report failures as a 500"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            api_url = printer_urls.get('api')
+            if not api_url:
+                return web.Response(body=_NO_PRINTER_IP_BODY, status=400, content_type='application/json')
+            try:
+                # Handlers append their endpoint path to the API base URL
+                return await handler(request, api_url, request.app['http_session'])
+            except Exception as e:
+                return json_response({'error': f'{error_prefix}: {str(e)}'}, status=500)
+        return wrapper
+    return decorator
+
 @routes.get('/api/printer-stats')
-async def get_printer_stats(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://{printer_ip}/api/v1/printer') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return web.json_response(data)
-                else:
-                    return web.json_response(
-                        {'error': f'Failed to fetch printer stats: {response.status}'}, 
-                        status=response.status
-                    )
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch printer stats: {str(e)}'}, 
-            status=500
+@with_printer('Failed to fetch printer stats')
+async def get_printer_stats(request, api_url, session):
+    status, body = await get_shared(request.app, session, f'{api_url}/printer', PRINTER_STATS_TTL)
+    if status == 200:
+        # Forward the printer's JSON unchanged instead of decoding and re-encoding it
+        return web.Response(body=body, content_type='application/json')
+    else:
+        return json_response(
+            {'error': f'Failed to fetch printer stats: {status}'}, 
+            status=status
         )
 
 @routes.get('/api/print-job')
-async def get_print_job(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://{printer_ip}/api/v1/print_job') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return web.json_response(data)
-                elif response.status == 404:
-                    # Return a specific response for "no job" case
-                    return web.json_response({'state': None, 'message': 'No print job is currently running'})
-                else:
-                    return web.json_response(
-                        {'error': f'Failed to fetch print job: {response.status}'}, 
-                        status=response.status
-                    )
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch print job: {str(e)}'}, 
-            status=500
+@with_printer('Failed to fetch print job')
+async def get_print_job(request, api_url, session):
+    status, body = await get_shared(request.app, session, f'{api_url}/print_job', PRINT_JOB_TTL)
+    if status == 200:
+        # Forward the printer's JSON unchanged instead of decoding and re-encoding it
+        return web.Response(body=body, content_type='application/json')
+    elif status == 404:
+        # Return a specific response for "no job" case
+        return json_response({'state': None, 'message': 'No print job is currently running'})
+    else:
+        return json_response(
+            {'error': f'Failed to fetch print job: {status}'}, 
+            status=status
         )
 
+@routes.get('/api/dashboard')
+@with_printer('Failed to fetch dashboard data')
+async def get_dashboard(request, api_url, session):
+    """Printer stats and the current print job from one request, fetched concurrently"""
+    (stats_status, stats_body), (job_status, job_body) = await asyncio.gather(
+        get_shared(request.app, session, f'{api_url}/printer', PRINTER_STATS_TTL),
+        get_shared(request.app, session, f'{api_url}/print_job', PRINT_JOB_TTL)
+    )
+    if stats_status != 200:
+        stats_body = orjson.dumps({'error': f'Failed to fetch printer stats: {stats_status}'})
+    if job_status == 404:
+        job_body = orjson.dumps({'state': None, 'message': 'No print job is currently running'})
+    elif job_status != 200:
+        job_body = orjson.dumps({'error': f'Failed to fetch print job: {job_status}'})
+    # Splice the printer's JSON bodies in unchanged rather than decoding them
+    body = b''.join((b'{"stats":', stats_body, b',"job":', job_body, b'}'))
+    return web.Response(body=body, content_type='application/json')
+
 @routes.get('/api/print-cores')
-async def get_print_cores(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://{printer_ip}/api/v1/system/log') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Initialize print core stats
-                    print_cores = {
-                        '0': {'last_extrusion': None, 'remaining_length': None, 'usage_duration': None},
-                        '1': {'last_extrusion': None, 'remaining_length': None, 'usage_duration': None}
-                    }
-                    
-                    # Regular expression pattern for print core info
-                    pattern = r"PrintCore (\d+) extruded ([\d.]+) mm in ([\d.]+) s, remaining length = ([\d.]+) mm, stat record usage duration: ([\d.]+) s"
-                    
-                    # Process log entries in reverse to get the most recent data
-                    for log_entry in reversed(data):
-                        if "PrintCore" in log_entry and "extruded" in log_entry:
-                            match = re.search(pattern, log_entry)
-                            if match:
-                                core_num = match.group(1)
-                                if print_cores[core_num]['last_extrusion'] is None:
-                                    print_cores[core_num] = {
-                                        'last_extrusion': {
-                                            'amount': float(match.group(2)),
-                                            'time': float(match.group(3))
-                                        },
-                                        'remaining_length': float(match.group(4)),
-                                        'usage_duration': float(match.group(5))
-                                    }
-                                    
-                                # If we have data for both cores, break
-                                if all(core['last_extrusion'] is not None for core in print_cores.values()):
-                                    break
-                    
-                    return web.json_response(print_cores)
-                else:
-                    return web.json_response(
-                        {'error': f'Failed to fetch system log: {response.status}'}, 
-                        status=response.status
-                    )
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch system log: {str(e)}'}, 
-            status=500
+@with_printer('Failed to fetch system log')
+async def get_print_cores(request, api_url, session):
+    status, data = await get_shared(request.app, session, f'{api_url}/system/log', SYSTEM_LOG_TTL, decode=True)
+    if status == 200:
+        # Initialize print core stats
+        print_cores = {
+            '0': {'last_extrusion': None, 'remaining_length': None, 'usage_duration': None},
+            '1': {'last_extrusion': None, 'remaining_length': None, 'usage_duration': None}
+        }
+        
+        # Scan newest lines only; stop once both cores are found
+        search = _RE_PRINTCORE.search
+        remaining = len(print_cores)
+        for log_entry in itertools.islice(reversed(data), PRINTCORE_SCAN_LIMIT):
+            if 'PrintCore ' not in log_entry:
+                continue
+            match = search(log_entry)
+            if not match:
+                continue
+            group = match.group
+            core = print_cores[group(1)]
+            if core['last_extrusion'] is None:
+                # Fill the preallocated entry in place
+                core['last_extrusion'] = {
+                    'amount': float(group(2)),
+                    'time': float(group(3))
+                }
+                core['remaining_length'] = float(group(4))
+                core['usage_duration'] = float(group(5))
+                remaining -= 1
+                if not remaining:
+                    break
+        
+        return json_response(print_cores)
+    else:
+        return json_response(
+            {'error': f'Failed to fetch system log: {status}'}, 
+            status=status
         )
 
 @routes.get('/api/system-log')
-async def get_system_log(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://{printer_ip}/api/v1/system/log') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Process logs using the log manager
-                    processed_logs = await log_manager.process_logs(data)
-                    
-                    # Sort by timestamp, newest first
-                    processed_logs.sort(key=lambda x: datetime.strptime(x['timestamp'], '%b %d %H:%M:%S'), reverse=True)
-                    
-                    # Clean up old data periodically
-                    await log_manager.clear_old_data()
-                    
-                    return web.json_response(processed_logs[-100:])  # Return last 100 messages
-                else:
-                    return web.json_response(
-                        {'error': f'Failed to fetch system log: {response.status}'}, 
-                        status=response.status
-                    )
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch system log: {str(e)}'}, 
-            status=500
+@with_printer('Failed to fetch system log')
+async def get_system_log(request, api_url, session):
+    status, data = await get_shared(request.app, session, f'{api_url}/system/log', SYSTEM_LOG_TTL, decode=True)
+    if status == 200:
+        # Process logs using the log manager
+        # Only the newest 100 message groups are returned, so stop
+        # walking back through the log once they are collected
+        # process_logs already returns them newest first, sorted on the
+        # timestamps it parsed once per line
+        processed_logs = await log_manager.process_logs(data, limit=100)
+        
+        # Clean up old data periodically
+        await log_manager.clear_old_data()
+        
+        return json_response(processed_logs)
+    else:
+        return json_response(
+            {'error': f'Failed to fetch system log: {status}'}, 
+            status=status
         )
 
 @routes.get('/api/flow-data/{samples}')
-async def get_flow_data(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
-    
+@with_printer('Failed to fetch flow data')
+async def get_flow_data(request, api_url, session):
     try:
-        samples = request.match_info['samples']
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://{printer_ip}/api/v1/printer/diagnostics/temperature_flow/{samples}') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Process the data to get the latest values and calculate averages
-                    if len(data) > 1:  # Check if we have the header and at least one data point
-                        headers = data[0]
-                        values = data[1:]  # Skip header row
-                        
-                        # Calculate statistics for each metric
-                        stats = {
-                            'extruder0': {
-                                'current_temp': values[-1][headers.index('temperature0')],
-                                'target_temp': values[-1][headers.index('target0')],
-                                'heater_power': values[-1][headers.index('heater0')],
-                                'flow_rate': values[-1][headers.index('flow_sensor0')],
-                                'total_steps': values[-1][headers.index('flow_steps0')]
-                            },
-                            'extruder1': {
-                                'current_temp': values[-1][headers.index('temperature1')],
-                                'target_temp': values[-1][headers.index('target1')],
-                                'heater_power': values[-1][headers.index('heater1')],
-                                'flow_rate': values[-1][headers.index('flow_sensor1')],
-                                'total_steps': values[-1][headers.index('flow_steps1')]
-                            },
-                            'bed': {
-                                'current_temp': values[-1][headers.index('bed_temperature')],
-                                'target_temp': values[-1][headers.index('bed_target')],
-                                'heater_power': values[-1][headers.index('bed_heater')]
-                            },
-                            'active_extruder': values[-1][headers.index('active_hotend_or_state')],
-                            'history': {
-                                'timestamps': [row[0] for row in values],
-                                'extruder0_temp': [row[headers.index('temperature0')] for row in values],
-                                'extruder1_temp': [row[headers.index('temperature1')] for row in values],
-                                'bed_temp': [row[headers.index('bed_temperature')] for row in values],
-                                'flow0': [row[headers.index('flow_sensor0')] for row in values],
-                                'flow1': [row[headers.index('flow_sensor1')] for row in values]
-                            }
-                        }
-                        
-                        return web.json_response(stats)
-                    else:
-                        return web.json_response({'error': 'Insufficient data points'}, status=400)
-                else:
-                    return web.json_response(
-                        {'error': f'Failed to fetch flow data: {response.status}'}, 
-                        status=response.status
-                    )
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch flow data: {str(e)}'}, 
-            status=500
-        )
+        samples = int(request.match_info['samples'])
+    except ValueError:
+        return json_response({'error': 'Samples must be an integer'}, status=400)
+    # Bound the upstream request and the history built from it
+    samples = max(1, min(samples, MAX_FLOW_SAMPLES))
+    
+    async with session.get(f'{api_url}/printer/diagnostics/temperature_flow/{samples}') as response:
+        if response.status == 200:
+            data = orjson.loads(await response.read())
+            
+            # Process the data to get the latest values and calculate averages
+            if len(data) > 1:  # Check if we have the header and at least one data point
+                headers = data[0]
+                values = data[1:]  # Skip header row
+                latest = values[-1]
+                
+                # Resolve each column's position once instead of per row
+                column = {name: headers.index(name) for name in (
+                    'temperature0', 'target0', 'heater0', 'flow_sensor0', 'flow_steps0',
+                    'temperature1', 'target1', 'heater1', 'flow_sensor1', 'flow_steps1',
+                    'bed_temperature', 'bed_target', 'bed_heater', 'active_hotend_or_state'
+                )}
+                temp0 = column['temperature0']
+                temp1 = column['temperature1']
+                bed_temp = column['bed_temperature']
+                flow0 = column['flow_sensor0']
+                flow1 = column['flow_sensor1']
+                
+                # Pull the charted columns out of every row in one pass and
+                # transpose them, rather than walking the rows once per column
+                history_columns = operator.itemgetter(0, temp0, temp1, bed_temp, flow0, flow1)
+                timestamps, ext0_temps, ext1_temps, bed_temps, flows0, flows1 = zip(*map(history_columns, values))
+                
+                # Calculate statistics for each metric
+                stats = {
+                    'extruder0': {
+                        'current_temp': latest[temp0],
+                        'target_temp': latest[column['target0']],
+                        'heater_power': latest[column['heater0']],
+                        'flow_rate': latest[flow0],
+                        'total_steps': latest[column['flow_steps0']]
+                    },
+                    'extruder1': {
+                        'current_temp': latest[temp1],
+                        'target_temp': latest[column['target1']],
+                        'heater_power': latest[column['heater1']],
+                        'flow_rate': latest[flow1],
+                        'total_steps': latest[column['flow_steps1']]
+                    },
+                    'bed': {
+                        'current_temp': latest[bed_temp],
+                        'target_temp': latest[column['bed_target']],
+                        'heater_power': latest[column['bed_heater']]
+                    },
+                    'active_extruder': latest[column['active_hotend_or_state']],
+                    'history': {
+                        'timestamps': timestamps,
+                        'extruder0_temp': ext0_temps,
+                        'extruder1_temp': ext1_temps,
+                        'bed_temp': bed_temps,
+                        'flow0': flows0,
+                        'flow1': flows1
+                    }
+                }
+                
+                return json_response(stats)
+            else:
+                return json_response({'error': 'Insufficient data points'}, status=400)
+        else:
+            return json_response(
+                {'error': f'Failed to fetch flow data: {response.status}'}, 
+                status=response.status
+            )
 
 @routes.get('/api/material-remaining')
-async def get_material_remaining(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
+@with_printer('Failed to fetch material data')
+async def get_material_remaining(request, api_url, session):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            # Fetch data for both extruders
-            results = {}
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            for extruder in [0, 1]:
-                url = f'http://{printer_ip}/api/v1/printer/heads/0/extruders/{extruder}/active_material/length_remaining'
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        length = await response.json()
-                        results[f'extruder{extruder}'] = {
-                            'length_remaining': length,
-                            'timestamp': timestamp
-                        }
-                    else:
-                        results[f'extruder{extruder}'] = {
-                            'error': f'Failed to fetch data: {response.status}',
-                            'timestamp': timestamp
-                        }
-            
-            return web.json_response(results)
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch material data: {str(e)}'}, 
-            status=500
-        )
+    extruders_url = f'{api_url}/printer/heads/0/extruders'
+    
+    async def fetch(extruder):
+        url = f'{extruders_url}/{extruder}/active_material/length_remaining'
+        async with session.get(url) as response:
+            if response.status == 200:
+                length = orjson.loads(await response.read())
+                return f'extruder{extruder}', {
+                    'length_remaining': length,
+                    'timestamp': timestamp
+                }
+            return f'extruder{extruder}', {
+                'error': f'Failed to fetch data: {response.status}',
+                'timestamp': timestamp
+            }
+    
+    # Fetch data for both extruders concurrently
+    results = dict(await asyncio.gather(fetch(0), fetch(1)))
+    
+    return json_response(results)
 
 @routes.get('/api/toolhead-calibration')
-async def get_toolhead_calibration(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
+@with_printer('Failed to fetch calibration data')
+async def get_toolhead_calibration(request, api_url, session):
+    extruders_url = f'{api_url}/printer/heads/0/extruders'
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            # Fetch data for both extruders
-            results = {}
-            for extruder in [0, 1]:
-                url = f'http://{printer_ip}/api/v1/printer/heads/0/extruders/{extruder}/hotend/offset'
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results[f'extruder{extruder}'] = data
-                    else:
-                        results[f'extruder{extruder}'] = {
-                            'error': f'Failed to fetch data: {response.status}'
-                        }
-            
-            return web.json_response(results)
-    except Exception as e:
-        return web.json_response(
-            {'error': f'Failed to fetch calibration data: {str(e)}'}, 
-            status=500
-        )
+    async def fetch(extruder):
+        url = f'{extruders_url}/{extruder}/hotend/offset'
+        async with session.get(url) as response:
+            if response.status == 200:
+                data = orjson.loads(await response.read())
+                return f'extruder{extruder}', data
+            return f'extruder{extruder}', {
+                'error': f'Failed to fetch data: {response.status}'
+            }
+    
+    # Fetch data for both extruders concurrently
+    results = dict(await asyncio.gather(fetch(0), fetch(1)))
+    
+    return json_response(results)
+
+def save_probe_report(file_path, raw_data):
+    """Write a downloaded probe report under data/probe_reports"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'wb') as f:
+        f.write(raw_data)
 
 @routes.get('/api/probing-report')
-async def get_probing_report(request):
-    printer_ip = os.getenv('PRINTER_IP')
-    if not printer_ip:
-        return web.json_response({'error': 'Printer IP not configured'}, status=400)
+@with_printer('Failed to fetch probing report')
+async def get_probing_report(request, api_url, session):
+    headers = {'Accept': 'application/gzip'}
+    url = f'{api_url}/printer/diagnostics/probing_report'
+    print(f"Fetching probing report from: {url}")
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            headers = {'Accept': 'application/gzip'}
-            url = f'http://{printer_ip}/api/v1/printer/diagnostics/probing_report'
-            print(f"Fetching probing report from: {url}")
+    async with session.get(url, headers=headers) as response:
+        print(f"Response status: {response.status}")
+        print(f"Response headers: {response.headers}")
+        
+        if response.status == 200:
+            # Get filename from Content-Disposition header
+            content_disp = response.headers.get('Content-Disposition', '')
+            filename = 'probe_report.json'
+            if 'filename=' in content_disp:
+                try:
+                    filename_part = content_disp.split('filename=')[1].strip()
+                    if filename_part.startswith('"') and filename_part.endswith('"'):
+                        filename = filename_part[1:-1]
+                    else:
+                        filename = filename_part.split(';')[0].strip()
+                except Exception:
+                    filename = 'probe_report.json'
+            
+            # Read the raw data
+            raw_data = await response.read()
+            print(f"Received {len(raw_data)} bytes")
             
-            async with session.get(url, headers=headers) as response:
-                print(f"Response status: {response.status}")
-                print(f"Response headers: {response.headers}")
+            # Save the file off the event loop; the parse below reads the
+            # same bytes, so the report is never copied
+            file_path = os.path.join('data', 'probe_reports', filename)
+            await asyncio.to_thread(save_probe_report, file_path, raw_data)
+            print(f"Saved probe report to {file_path}")
+            
+            # The analysis depends only on the report and the tolerance, so an
+            # unchanged report is answered from the cache with a fresh timestamp
+            report_cache = request.app['probe_report_cache']
+            cache_key = (filename, hashlib.blake2b(raw_data, digest_size=16).digest(), config['tolerance_threshold'])
+            cached = report_cache.get(cache_key)
+            if cached is not None:
+                report_cache.move_to_end(cache_key)
+                return json_response({**cached, 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+            
+            try:
+                # Parse the JSON data straight from the bytes already read
+                data = orjson.loads(raw_data)
+                print("Successfully parsed JSON data")
                 
-                if response.status == 200:
-                    # Get filename from Content-Disposition header
-                    content_disp = response.headers.get('Content-Disposition', '')
-                    filename = 'probe_report.json'
-                    if 'filename=' in content_disp:
-                        try:
-                            filename_part = content_disp.split('filename=')[1].strip()
-                            if filename_part.startswith('"') and filename_part.endswith('"'):
-                                filename = filename_part[1:-1]
-                            else:
-                                filename = filename_part.split(';')[0].strip()
-                        except Exception:
-                            filename = 'probe_report.json'
-                    
-                    # Read the raw data
-                    raw_data = await response.read()
-                    print(f"Received {len(raw_data)} bytes")
-                    
-                    # Save the file
-                    reports_dir = os.path.join('data', 'probe_reports')
-                    os.makedirs(reports_dir, exist_ok=True)
-                    file_path = os.path.join(reports_dir, filename)
+                # Get the most recent report (key '0')
+                if '0' not in data:
+                    print("No recent probe report found")
+                    print(f"Available keys: {list(data.keys())}")
+                    return json_response({
+                        'error': 'No recent probe report found'
+                    }, status=400)
+                
+                report = data['0']  # Get most recent report
+                print("Processing most recent probe report")
+                
+                # Process probe points
+                rows = []
+                
+                if '_ProbeReport__probe_points' in report:
+                    probe_points = report['_ProbeReport__probe_points']
                     
-                    with open(file_path, 'wb') as f:
-                        f.write(raw_data)
-                    print(f"Saved probe report to {file_path}")
+                    for point in probe_points:
+                        try:
+                            location = point['_ProbePoint__location']
+                            x = location['_Vector2__x']
+                            y = location['_Vector2__y']
+                            z = point['_ProbePoint__z_offset_from_bed_zero']
+                            timestamp = point['_ProbePoint__date_time']
+                            bed_temp = point['_ProbePoint__bed_temp']
+                            nozzle_temp = point['_ProbePoint__nozzle_temp']
+                            
+                            rows.append((x, y, z))
+                        except KeyError as e:
+                            print(f"Error processing point: {e}")
+                            continue
                     
-                    try:
-                        # Parse the JSON data
-                        data = json.loads(raw_data)
-                        print("Successfully parsed JSON data")
+                    if rows:
+                        # Convert every coordinate in one array build, then
+                        # take the positions and heights as column views
+                        probe = np.array(rows, dtype=float)
+                        points = probe[:, :2]
+                        z_values = probe[:, 2]
                         
-                        # Get the most recent report (key '0')
-                        if '0' not in data:
-                            print("No recent probe report found")
-                            print(f"Available keys: {list(data.keys())}")
-                            return web.json_response({
-                                'error': 'No recent probe report found'
-                            }, status=400)
+                        # Calculate statistics; the deviations from the mean are
+                        # computed once and the extremes read at their indices
+                        z_mean = float(np.mean(z_values))
+                        relative_values = z_values - z_mean
+                        min_idx = np.argmin(relative_values)
+                        max_idx = np.argmax(relative_values)
+                        z_min = float(relative_values[min_idx])  # Relative min deviation
+                        z_max = float(relative_values[max_idx])  # Relative max deviation
+                        z_sum_squares = float(relative_values @ relative_values)
+                        z_std = float(np.sqrt(z_sum_squares / len(z_values)))
+                        z_variance = z_max - z_min  # This is now the total relative variance
                         
-                        report = data['0']  # Get most recent report
-                        print("Processing most recent probe report")
+                        # Analyze bed tilt - center the positions once and get both
+                        # correlations from dot products with the deviations
+                        centered = points - points.mean(axis=0)
+                        x_correlation, y_correlation = (
+                            (centered.T @ relative_values) / np.sqrt((centered * centered).sum(axis=0) * z_sum_squares)
+                        ).tolist()
                         
-                        # Process probe points
-                        points = []
-                        z_values = []
+                        # Find min/max point locations
+                        min_point = points[min_idx].tolist()
+                        max_point = points[max_idx].tolist()
                         
-                        if '_ProbeReport__probe_points' in report:
-                            probe_points = report['_ProbeReport__probe_points']
-                            
-                            for point in probe_points:
-                                try:
-                                    location = point['_ProbePoint__location']
-                                    x = location['_Vector2__x']
-                                    y = location['_Vector2__y']
-                                    z = point['_ProbePoint__z_offset_from_bed_zero']
-                                    timestamp = point['_ProbePoint__date_time']
-                                    bed_temp = point['_ProbePoint__bed_temp']
-                                    nozzle_temp = point['_ProbePoint__nozzle_temp']
-                                    
-                                    points.append([x, y])
-                                    z_values.append(z)
-                                except KeyError as e:
-                                    print(f"Error processing point: {e}")
-                                    continue
-                            
-                            if points:
-                                points = np.array(points)
-                                z_values = np.array(z_values)
-                                
-                                # Calculate statistics
-                                z_mean = float(np.mean(z_values))
-                                z_min = float(np.min(z_values - z_mean))  # Relative min deviation
-                                z_max = float(np.max(z_values - z_mean))  # Relative max deviation
-                                z_std = float(np.std(z_values))
-                                z_variance = z_max - z_min  # This is now the total relative variance
-                                
-                                # Analyze bed tilt
-                                x_correlation = float(np.corrcoef(points[:, 0], z_values)[0, 1])
-                                y_correlation = float(np.corrcoef(points[:, 1], z_values)[0, 1])
-                                
-                                # Find min/max point locations
-                                relative_values = z_values - z_mean
-                                min_idx = np.argmin(relative_values)
-                                max_idx = np.argmax(relative_values)
-                                min_point = points[min_idx].tolist()
-                                max_point = points[max_idx].tolist()
-                                
-                                # Determine bed leveling status
-                                tolerance = config['tolerance_threshold']
-                                half_tolerance = tolerance / 2
-                                
-                                if z_variance < half_tolerance:
-                                    assessment = "well-leveled"
-                                    message = f"Bed is well-leveled (variance < {half_tolerance:.1f}mm)"
-                                elif z_variance < tolerance:
-                                    assessment = "acceptable"
-                                    message = f"Bed leveling is acceptable but could be improved"
+                        # Determine bed leveling status
+                        tolerance = config['tolerance_threshold']
+                        half_tolerance = tolerance / 2
+                        
+                        if z_variance < half_tolerance:
+                            assessment = "well-leveled"
+                            message = f"Bed is well-leveled (variance < {half_tolerance:.1f}mm)"
+                        elif z_variance < tolerance:
+                            assessment = "acceptable"
+                            message = f"Bed leveling is acceptable but could be improved"
+                        else:
+                            assessment = "needs attention"
+                            message = f"Bed requires leveling attention (variance > {tolerance:.1f}mm)"
+                        
+                        # Generate recommendations
+                        recommendations = []
+                        if abs(x_correlation) > 0.3 or abs(y_correlation) > 0.3:
+                            if abs(x_correlation) > abs(y_correlation):
+                                if x_correlation > 0:
+                                    recommendations.append("Bed appears tilted up towards the right side - adjust right side leveling screws slightly lower")
                                 else:
-                                    assessment = "needs attention"
-                                    message = f"Bed requires leveling attention (variance > {tolerance:.1f}mm)"
-                                
-                                # Generate recommendations
-                                recommendations = []
-                                if abs(x_correlation) > 0.3 or abs(y_correlation) > 0.3:
-                                    if abs(x_correlation) > abs(y_correlation):
-                                        if x_correlation > 0:
-                                            recommendations.append("Bed appears tilted up towards the right side - adjust right side leveling screws slightly lower")
-                                        else:
-                                            recommendations.append("Bed appears tilted up towards the left side - adjust left side leveling screws slightly lower")
-                                    else:
-                                        if y_correlation > 0:
-                                            recommendations.append("Bed appears tilted up towards the back - adjust back leveling screws slightly lower")
-                                        else:
-                                            recommendations.append("Bed appears tilted up towards the front - adjust front leveling screws slightly lower")
-                                
-                                if z_variance > half_tolerance:
-                                    if z_variance > tolerance:
-                                        recommendations.append("Perform a complete bed leveling procedure")
-                                        recommendations.append("Focus on the areas with extreme values first")
-                                    else:
-                                        recommendations.append("Fine-tune the leveling near the highest and lowest points")
-                                
-                                if z_std > half_tolerance:
-                                    recommendations.append("Check for debris or buildup on the bed surface")
-                                    recommendations.append("Consider cleaning the bed with IPA")
-                                
-                                result = {
-                                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                    'file_path': file_path,
-                                    'file_size': len(raw_data),
-                                    'measurements': [
-                                        {
-                                            'x': float(point[0]),
-                                            'y': float(point[1]),
-                                            'height': float(z - z_mean),  # Relative height
-                                            'deviation': float(z - z_mean)  # Same as height for clarity
-                                        }
-                                        for point, z in zip(points, z_values)
-                                    ],
-                                    'statistics': {
-                                        'min_height': z_min,  # Now relative to mean
-                                        'max_height': z_max,  # Now relative to mean
-                                        'std_deviation': z_std,
-                                        'max_deviation': z_variance,
-                                        'point_count': len(points),
-                                        'reference_height': float(z_mean)  # Include the reference height
-                                    },
-                                    'analysis': {
-                                        'assessment': assessment,
-                                        'message': message,
-                                        'recommendations': recommendations,
-                                        'min_point': {
-                                            'x': float(min_point[0]),
-                                            'y': float(min_point[1]),
-                                            'z': float(z_min)
-                                        },
-                                        'max_point': {
-                                            'x': float(max_point[0]),
-                                            'y': float(max_point[1]),
-                                            'z': float(z_max)
-                                        },
-                                        'correlations': {
-                                            'x_tilt': x_correlation,
-                                            'y_tilt': y_correlation
-                                        }
-                                    },
-                                    'temperatures': {
-                                        'bed': bed_temp,
-                                        'nozzle': nozzle_temp
-                                    },
-                                    'tolerance_threshold': config['tolerance_threshold'],  # Use config value
-                                    'out_of_tolerance': z_variance >= config['tolerance_threshold']
-                                }
-                                
-                                print(f"Processed {len(points)} probe points")
-                                print(f"Analysis: {assessment} (variance: {z_variance:.3f}mm)")
-                                
-                                return web.json_response(result)
+                                    recommendations.append("Bed appears tilted up towards the left side - adjust left side leveling screws slightly lower")
                             else:
-                                return web.json_response({
-                                    'error': 'No valid probe points found in data'
-                                }, status=400)
-                        else:
-                            print("No probe points found in report")
-                            print(f"Available keys in report: {list(report.keys())}")
-                            return web.json_response({
-                                'error': 'Invalid probing report format - no probe points found'
-                            }, status=400)
-                    except Exception as e:
-                        print(f"Error processing probe report: {e}")
-                        return web.json_response({
-                            'error': 'Failed to process probe report',
-                            'details': str(e),
+                                if y_correlation > 0:
+                                    recommendations.append("Bed appears tilted up towards the back - adjust back leveling screws slightly lower")
+                                else:
+                                    recommendations.append("Bed appears tilted up towards the front - adjust front leveling screws slightly lower")
+                        
+                        if z_variance > half_tolerance:
+                            if z_variance > tolerance:
+                                recommendations.append("Perform a complete bed leveling procedure")
+                                recommendations.append("Focus on the areas with extreme values first")
+                            else:
+                                recommendations.append("Fine-tune the leveling near the highest and lowest points")
+                        
+                        if z_std > half_tolerance:
+                            recommendations.append("Check for debris or buildup on the bed surface")
+                            recommendations.append("Consider cleaning the bed with IPA")
+                        
+                        result = {
+                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                             'file_path': file_path,
-                            'file_size': len(raw_data)
-                        }, status=500)
-                elif response.status == 204:
-                    return web.json_response({
-                        'error': 'No probing report available'
-                    }, status=204)
+                            'file_size': len(raw_data),
+                            'measurements': [
+                                {
+                                    'x': x,
+                                    'y': y,
+                                    'height': deviation,  # Relative height
+                                    'deviation': deviation  # Same as height for clarity
+                                }
+                                for (x, y), deviation in zip(points.tolist(), relative_values.tolist())
+                            ],
+                            'statistics': {
+                                'min_height': z_min,  # Now relative to mean
+                                'max_height': z_max,  # Now relative to mean
+                                'std_deviation': z_std,
+                                'max_deviation': z_variance,
+                                'point_count': len(points),
+                                'reference_height': float(z_mean)  # Include the reference height
+                            },
+                            'analysis': {
+                                'assessment': assessment,
+                                'message': message,
+                                'recommendations': recommendations,
+                                'min_point': {
+                                    'x': float(min_point[0]),
+                                    'y': float(min_point[1]),
+                                    'z': float(z_min)
+                                },
+                                'max_point': {
+                                    'x': float(max_point[0]),
+                                    'y': float(max_point[1]),
+                                    'z': float(z_max)
+                                },
+                                'correlations': {
+                                    'x_tilt': x_correlation,
+                                    'y_tilt': y_correlation
+                                }
+                            },
+                            'temperatures': {
+                                'bed': bed_temp,
+                                'nozzle': nozzle_temp
+                            },
+                            'tolerance_threshold': config['tolerance_threshold'],  # Use config value
+                            'out_of_tolerance': z_variance >= config['tolerance_threshold']
+                        }
+                        
+                        report_cache[cache_key] = result
+                        if len(report_cache) > PROBE_REPORT_CACHE_SIZE:
+                            report_cache.popitem(last=False)
+                        
+                        print(f"Processed {len(points)} probe points")
+                        print(f"Analysis: {assessment} (variance: {z_variance:.3f}mm)")
+                        
+                        return json_response(result)
+                    else:
+                        return json_response({
+                            'error': 'No valid probe points found in data'
+                        }, status=400)
                 else:
-                    return web.json_response({
-                        'error': f'Failed to fetch probing report: {response.status}'
-                    }, status=response.status)
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        return web.json_response({
-            'error': f'Failed to fetch probing report: {str(e)}'
-        }, status=500)
+                    print("No probe points found in report")
+                    print(f"Available keys in report: {list(report.keys())}")
+                    return json_response({
+                        'error': 'Invalid probing report format - no probe points found'
+                    }, status=400)
+            except Exception as e:
+                print(f"Error processing probe report: {e}")
+                return json_response({
+                    'error': 'Failed to process probe report',
+                    'details': str(e),
+                    'file_path': file_path,
+                    'file_size': len(raw_data)
+                }, status=500)
+        elif response.status == 204:
+            return json_response({
+                'error': 'No probing report available'
+            }, status=204)
+        else:
+            return json_response({
+                'error': f'Failed to fetch probing report: {response.status}'
+            }, status=response.status)
 
 @routes.get('/api/tolerance-threshold')
 async def get_tolerance_threshold(request):
     """Get the current tolerance threshold"""
-    return web.json_response({'tolerance_threshold': config['tolerance_threshold']})
+    return json_response({'tolerance_threshold': config['tolerance_threshold']})
 
 @routes.post('/api/tolerance-threshold')
 async def update_tolerance_threshold(request):
     """Update the tolerance threshold"""
     try:
-        data = await request.json()
+        data = orjson.loads(await request.read())
         if 'tolerance_threshold' in data:
             new_tolerance = float(data['tolerance_threshold'])
             if new_tolerance <= 0:
-                return web.json_response({'error': 'Tolerance threshold must be positive'}, status=400)
+                return json_response({'error': 'Tolerance threshold must be positive'}, status=400)
             
             config['tolerance_threshold'] = new_tolerance
-            return web.json_response({'status': 'success', 'tolerance_threshold': new_tolerance})
-        return web.json_response({'error': 'Invalid request data'}, status=400)
+            return json_response({'status': 'success', 'tolerance_threshold': new_tolerance})
+        return json_response({'error': 'Invalid request data'}, status=400)
     except Exception as e:
-        return web.json_response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 
 async def get_config(request):
     """Get current configuration"""
-    return web.json_response(config)
+    return json_response(config)
+
+def write_env_value(key, value, env_path='.env'):
+    """Set KEY=value in the .env file, replacing it atomically"""
+    # Read existing .env lines
+    lines = []
+    if os.path.exists(env_path):
+        with open(env_path, 'r') as f:
+            lines = f.readlines()
+    # Update or add the key
+    found = False
+    for i, line in enumerate(lines):
+        if line.strip().startswith(f'{key}='):
+            lines[i] = f"{key}={value}\n"
+            found = True
+            break
+    if not found:
+        if lines and not lines[-1].endswith('\n'):
+            lines[-1] += '\n'
+        lines.append(f"{key}={value}\n")
+    # Write to a temporary file and swap it in so readers never see a partial file
+    tmp_path = f'{env_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.writelines(lines)
+        # Make sure the new contents are on disk before the rename publishes them
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, env_path)
 
 async def update_config(request):
     """Update configuration"""
     try:
-        data = await request.json()
+        data = orjson.loads(await request.read())
         if 'printer_ip' in data:
+            # Nothing to persist if the address did not change
+            if data['printer_ip'] == config['printer_ip']:
+                return json_response({'status': 'success'})
             config['printer_ip'] = data['printer_ip']
-            # Read existing .env lines
-            env_path = '.env'
-            lines = []
-            if os.path.exists(env_path):
-                with open(env_path, 'r') as f:
-                    lines = f.readlines()
-            # Update or add PRINTER_IP
-            found = False
-            for i, line in enumerate(lines):
-                if line.strip().startswith('PRINTER_IP='):
-                    lines[i] = f"PRINTER_IP={config['printer_ip']}\n"
-                    found = True
-                    break
-            if not found:
-                lines.append(f"PRINTER_IP={config['printer_ip']}\n")
-            # Write back all lines
-            with open(env_path, 'w') as f:
-                f.writelines(lines)
-            return web.json_response({'status': 'success'})
-        return web.json_response({'status': 'error', 'message': 'Invalid configuration'}, status=400)
+            rebuild_printer_urls()
+            # Write the file off the event loop, one write at a time so the
+            # temporary file is never shared and the newest address lands last
+            async with request.app['env_write_lock']:
+                await asyncio.to_thread(write_env_value, 'PRINTER_IP', config['printer_ip'])
+            return json_response({'status': 'success'})
+        return json_response({'status': 'error', 'message': 'Invalid configuration'}, status=400)
     except Exception as e:
-        return web.json_response({'status': 'error', 'message': str(e)}, status=500)
+        return json_response({'status': 'error', 'message': str(e)}, status=500)
+
+# The stream body never ends, so only connecting and reading the status
+# line are timed; a dead printer fails within two seconds
+CONNECTION_TEST_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=2.0, sock_read=2.0)
 
 async def test_connection(request):
     """Test connection to the printer"""
-    if not config['printer_ip']:
-        return web.json_response({
+    stream_url = printer_urls.get('stream')
+    if not stream_url:
+        return json_response({
             'status': 'error',
             'message': 'Printer IP not configured',
             'connected': False
         })
 
     try:
-        async with aiohttp.ClientSession() as session:
-            # Try to connect to the printer's camera stream
-            url = f"http://{config['printer_ip']}:8080/?action=stream"
-            async with session.get(url, timeout=5) as response:
-                if response.status == 200:
-                    return web.json_response({
-                        'status': 'success',
-                        'message': 'Connected to printer',
-                        'connected': True
-                    })
-                else:
-                    return web.json_response({
-                        'status': 'error',
-                        'message': f'Printer responded with status {response.status}',
-                        'connected': False
-                    })
+        session = request.app['http_session']
+        # Try to connect to the printer's camera stream
+        async with session.get(stream_url, timeout=CONNECTION_TEST_TIMEOUT) as response:
+            # Only the status line matters; drop the connection right away
+            # so the printer stops sending MJPEG frames
+            response.close()
+            if response.status == 200:
+                return json_response({
+                    'status': 'success',
+                    'message': 'Connected to printer',
+                    'connected': True
+                })
+            else:
+                return json_response({
+                    'status': 'error',
+                    'message': f'Printer responded with status {response.status}',
+                    'connected': False
+                })
     except aiohttp.ClientError as e:
-        return web.json_response({
+        return json_response({
             'status': 'error',
             'message': str(e),
             'connected': False
         })
     except Exception as e:
-        return web.json_response({
+        return json_response({
             'status': 'error',
             'message': str(e),
             'connected': False
@@ -616,18 +717,61 @@ async def test_connection(request):
 
 async def camera_stream(request):
     """Proxy the camera stream from the printer"""
-    if not config['printer_ip']:
+    stream_url = printer_urls.get('stream')
+    if not stream_url:
         return web.Response(status=400, text='Printer IP not configured')
 
-    try:
-        # Instead of proxying the stream, redirect to the printer's camera stream
-        return web.HTTPFound(f"http://{config['printer_ip']}:8080/?action=stream")
-    except Exception as e:
-        return web.Response(status=500, text=str(e))
+    # Instead of proxying the stream, redirect to the printer's camera stream
+    # with a plain response rather than the HTTPFound exception type
+    return web.Response(status=302, headers={'Location': stream_url})
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip, honouring q=0"""
+    wildcard = False
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        if name not in ('gzip', 'x-gzip', '*'):
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == '*':
+            wildcard = quality > 0
+        else:
+            # An explicit gzip entry overrides the wildcard either way
+            return quality > 0
+    return wildcard
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches etag, using weak comparison"""
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
 
 async def index(request):
-    """Serve the main page"""
-    return web.FileResponse('src/templates/index.html')
+    """Serve the main page from memory, gzipped when the client accepts it"""
+    page = request.app['index_page']
+    use_gzip = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+    etag = page['gzip_etag'] if use_gzip else page['etag']
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache', 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('If-None-Match', ''), etag):
+        return web.Response(status=304, headers=headers)
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return web.Response(body=page['gzip'], content_type='text/html', charset='utf-8', headers=headers)
+    return web.Response(body=page['body'], content_type='text/html', charset='utf-8', headers=headers)
 
 @routes.get('/api/events')
 async def get_events(request):
@@ -647,9 +791,9 @@ async def get_events(request):
                 pass
                 
         events = await event_log_service.get_formatted_events(count)
-        return web.json_response(events)
+        return json_response(events)
     except Exception as e:
-        return web.json_response(
+        return json_response(
             {'error': f'Failed to fetch events: {str(e)}'}, 
             status=500
         )
@@ -688,9 +832,9 @@ async def get_print_jobs(request):
                 pass
                 
         print_jobs = await print_jobs_service.get_formatted_print_jobs(count)
-        return web.json_response(print_jobs)
+        return json_response(print_jobs)
     except Exception as e:
-        return web.json_response(
+        return json_response(
             {'error': f'Failed to fetch print jobs: {str(e)}'}, 
             status=500
         )
@@ -715,7 +859,7 @@ async def print_jobs_page(request):
 async def get_alerts(request):
     """Get all active alerts"""
     alerts = log_manager.alerts_service.get_active_alerts()
-    return web.json_response(alerts)
+    return json_response(alerts)
 
 @routes.get('/api/alerts/history')
 async def get_alert_history(request):
@@ -726,7 +870,7 @@ async def get_alert_history(request):
     except ValueError:
         limit = 100
     alerts = log_manager.alerts_service.get_alert_history(limit)
-    return web.json_response(alerts)
+    return json_response(alerts)
 
 @routes.post('/api/alerts/{alert_id}/resolve')
 async def resolve_alert(request):
@@ -734,8 +878,8 @@ async def resolve_alert(request):
     alert_id = request.match_info['alert_id']
     alert = await log_manager.alerts_service.resolve_alert(alert_id)
     if alert:
-        return web.json_response(alert)
-    return web.json_response({'error': 'Alert not found'}, status=404)
+        return json_response(alert)
+    return json_response({'error': 'Alert not found'}, status=404)
 
 @routes.get('/api/alerts/stream')
 async def alert_stream(request):
@@ -756,8 +900,7 @@ async def alert_stream(request):
     try:
         # Send initial data
         alerts = log_manager.alerts_service.get_active_alerts()
-        data = json.dumps(alerts)
-        await response.write(f'event: message\ndata: {data}\n\n'.encode())
+        await response.write(b'event: message\ndata: ' + orjson.dumps(alerts) + b'\n\n')
         await response.drain()
 
         # Keep connection alive and send updates
@@ -766,8 +909,7 @@ async def alert_stream(request):
             alerts = log_manager.alerts_service.get_active_alerts()
             
             # Send alerts as SSE
-            data = json.dumps(alerts)
-            await response.write(f'event: message\ndata: {data}\n\n'.encode())
+            await response.write(b'event: message\ndata: ' + orjson.dumps(alerts) + b'\n\n')
             await response.drain()
             
             # Add a heartbeat event to keep connection alive
@@ -800,6 +942,45 @@ async def auth_middleware(request, handler):
     # User is authenticated, proceed with the request
     return await handler(request)
 
+async def create_http_session(app):
+    """Create the HTTP session shared by the printer proxy handlers and services"""
+    # Keep connections to the printer alive and cache its DNS lookup; bound
+    # how many are open and how long a stalled printer can hold a request
+    connector = aiohttp.TCPConnector(limit=16, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=120)
+    timeout = aiohttp.ClientTimeout(total=10, connect=3, sock_read=5)
+    app['http_session'] = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    # The history services talk to the same printer, so they share the pool
+    event_log_service.use_session(app['http_session'])
+    print_jobs_service.use_session(app['http_session'])
+
+async def create_env_write_lock(app):
+    """Create the lock serializing .env rewrites, on the loop that will use it"""
+    app['env_write_lock'] = asyncio.Lock()
+
+async def load_index_page(app):
+    """Read the main page once at startup along with its gzipped copy and ETags"""
+    def read_page():
+        with open('src/templates/index.html', 'rb') as f:
+            return f.read()
+    body = await asyncio.to_thread(read_page)
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    # Each encoding is a different representation, so each gets its own tag
+    app['index_page'] = {
+        'body': body,
+        'gzip': gzip.compress(body),
+        'etag': f'"{digest}"',
+        'gzip_etag': f'"{digest}-gzip"'
+    }
+
+async def add_static_cache_headers(request, response):
+    """Let browsers reuse static assets for an hour"""
+    if request.path.startswith('/static/'):
+        response.headers.setdefault('Cache-Control', 'public, max-age=3600')
+
+async def close_http_session(app):
+    """Close the HTTP session shared by the proxy handlers and services"""
+    await app['http_session'].close()
+
 def init_app():
     """Initialize the application"""
     # Create the application with both middlewares
@@ -808,6 +989,12 @@ def init_app():
         auth_middleware
     ])
     
+    # Recent upstream responses and the requests still in flight, by URL and decoding
+    app['upstream_cache'] = {}
+    app['upstream_inflight'] = {}
+    # Analyzed probe reports by file name, content hash and tolerance, oldest first
+    app['probe_report_cache'] = OrderedDict()
+    
     # Set the secret key for the session
     app['session_secret_key'] = SECRET_KEY.encode('utf-8')
     
@@ -828,46 +1015,61 @@ def init_app():
         )
     })
     
-    # Configure routes
-    app.router.add_get('/', index)
-    app.router.add_get('/login', login_page)
-    app.router.add_post('/login', login_handler)
-    app.router.add_get('/logout', logout_handler)
-    app.router.add_get('/api/config', get_config)
-    app.router.add_post('/api/config', update_config)
-    app.router.add_get('/api/test-connection', test_connection)
-    app.router.add_get('/api/camera/stream', camera_stream)
-    app.router.add_get('/api/printer-stats', get_printer_stats)
-    app.router.add_get('/api/print-job', get_print_job)
-    app.router.add_get('/api/print-cores', get_print_cores)
-    app.router.add_get('/api/system-log', get_system_log)
-    app.router.add_get('/api/flow-data/{samples}', get_flow_data)
-    app.router.add_get('/api/material-remaining', get_material_remaining)
-    app.router.add_get('/api/toolhead-calibration', get_toolhead_calibration)
-    app.router.add_get('/api/probing-report', get_probing_report)
-    app.router.add_get('/api/tolerance-threshold', get_tolerance_threshold)
-    app.router.add_post('/api/tolerance-threshold', update_tolerance_threshold)
-    app.router.add_get('/api/events', get_events)
-    app.router.add_get('/api/alerts', get_alerts)
-    app.router.add_get('/api/alerts/history', get_alert_history)
-    app.router.add_post('/api/alerts/{alert_id}/resolve', resolve_alert)
-    app.router.add_get('/api/alerts/stream', alert_stream)
+    # Configure routes, enabling CORS on each one as it is added
+    cors.add(app.router.add_get('/', index))
+    cors.add(app.router.add_get('/login', login_page))
+    cors.add(app.router.add_post('/login', login_handler))
+    cors.add(app.router.add_get('/logout', logout_handler))
+    cors.add(app.router.add_get('/api/config', get_config))
+    cors.add(app.router.add_post('/api/config', update_config))
+    cors.add(app.router.add_get('/api/test-connection', test_connection))
+    cors.add(app.router.add_get('/api/camera/stream', camera_stream))
+    cors.add(app.router.add_get('/api/printer-stats', get_printer_stats))
+    cors.add(app.router.add_get('/api/print-job', get_print_job))
+    cors.add(app.router.add_get('/api/dashboard', get_dashboard))
+    cors.add(app.router.add_get('/api/print-cores', get_print_cores))
+    cors.add(app.router.add_get('/api/system-log', get_system_log))
+    cors.add(app.router.add_get('/api/flow-data/{samples}', get_flow_data))
+    cors.add(app.router.add_get('/api/material-remaining', get_material_remaining))
+    cors.add(app.router.add_get('/api/toolhead-calibration', get_toolhead_calibration))
+    cors.add(app.router.add_get('/api/probing-report', get_probing_report))
+    cors.add(app.router.add_get('/api/tolerance-threshold', get_tolerance_threshold))
+    cors.add(app.router.add_post('/api/tolerance-threshold', update_tolerance_threshold))
+    cors.add(app.router.add_get('/api/events', get_events))
+    cors.add(app.router.add_get('/api/alerts', get_alerts))
+    cors.add(app.router.add_get('/api/alerts/history', get_alert_history))
+    cors.add(app.router.add_post('/api/alerts/{alert_id}/resolve', resolve_alert))
+    cors.add(app.router.add_get('/api/alerts/stream', alert_stream))
     
     # Add event log route directly without using @routes decorator
-    app.router.add_get('/event-log', event_log_page)
+    cors.add(app.router.add_get('/event-log', event_log_page))
     
-    app.router.add_get('/api/print-jobs', get_print_jobs)
-    app.router.add_get('/print-jobs', print_jobs_page)
+    cors.add(app.router.add_get('/api/print-jobs', get_print_jobs))
+    cors.add(app.router.add_get('/print-jobs', print_jobs_page))
     
-    app.router.add_static('/static', 'src/static')
+    cors.add(app.router.add_static('/static', 'src/static'))
     
-    # Configure CORS for all routes
-    for route in list(app.router.routes()):
-        cors.add(route)
+    # Open pooled upstream connections and load the main page on startup,
+    # and close the connections on shutdown
+    app.on_startup.append(create_http_session)
+    app.on_startup.append(load_index_page)
+    app.on_startup.append(create_env_write_lock)
+    app.on_response_prepare.append(add_static_cache_headers)
+    app.on_cleanup.append(close_http_session)
     
     return app
 
 if __name__ == '__main__':
+    # uvloop is not available on Windows; stay on the default loop there.
+    # The loop is handed to run_app since uvloop.install() is deprecated on 3.12+
+    try:
+        import uvloop
+    except ImportError:
+        loop = None
+    else:
+        loop = uvloop.new_event_loop()
     app = init_app()
-    print("Starting UltiUI server on http://localhost:8081")
-    web.run_app(app, host='0.0.0.0', port=8081)
\ No newline at end of file
+    # Access logging costs a formatted line per request, so it is opt-in
+    access_log = access_logger if os.getenv('ACCESS_LOG') else None
+    web.run_app(app, host='0.0.0.0', port=8081, access_log=access_log,
+                access_log_format='%a "%r" %s %Tf', loop=loop)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import aiohttp
+import orjson
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
@@ -6,6 +7,14 @@ class PrintJobsService:
     def __init__(self, base_url: str = "http://192.168.6.218"):
         self.base_url = base_url
         self.print_jobs_endpoint = f"{base_url}/api/v1/history/print_jobs"
+        self.session: Optional[aiohttp.ClientSession] = None  # The app's shared client session
+
+    def use_session(self, session: aiohttp.ClientSession) -> None:
+        """
+        Make requests on the app's shared client session; the app owns
+        it and closes it on cleanup
+        """
+        self.session = session
 
     async def get_print_jobs(self, count: Optional[int] = None) -> List[Dict[Any, Any]]:
         """
@@ -19,13 +28,12 @@ class PrintJobsService:
             if count is not None:
                 url = f"{url}?count={count}"
                 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Error fetching print jobs: {response.status}")
-                        return []
+            async with self.session.get(url) as response:
+                if response.status == 200:
+                    return orjson.loads(await response.read())
+                else:
+                    print(f"Error fetching print jobs: {response.status}")
+                    return []
         except Exception as e:
             print(f"Error fetching print jobs: {e}")
             return []